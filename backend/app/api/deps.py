@@ -1,17 +1,75 @@
+from pgvector.utils import Vector
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from app.config import get_settings
 
 settings = get_settings()
 
-engine = create_async_engine(
+
+def _encode_vector(value) -> bytes:
+    # ORM columns arrive as text already rendered by pgvector's SQLAlchemy
+    # type; raw query parameters arrive as float32 arrays
+    if isinstance(value, str):
+        value = Vector.from_text(value)
+    return Vector._to_db_binary(value)
+
+
+_VECTOR_SCHEMA_SQL = """
+    SELECT n.nspname
+    FROM pg_type AS t
+    JOIN pg_namespace AS n ON n.oid = t.typnamespace
+    WHERE t.typname = 'vector'
+    LIMIT 1
+"""
+
+
+async def _register_vector_codec(conn):
+    # The extension may live outside public (Supabase uses "extensions"), or
+    # not exist yet on a fresh database — lifespan creates it and then resets
+    # the pool so new connections pick the codec up.
+    schema = await conn.fetchval(_VECTOR_SCHEMA_SQL)
+    if schema is None:
+        return
+    await conn.set_type_codec(
+        "vector",
+        schema=schema,
+        encoder=_encode_vector,
+        decoder=Vector._from_db_binary,
+        format="binary",
+    )
+
+
+def _on_connect(dbapi_connection, connection_record):
+    dbapi_connection.run_async(_register_vector_codec)
+
+
+def create_db_engine(db_url: str, mode: str | None = None, **kwargs):
+    """
+    Create an async engine for the given connection mode (default: settings).
+
+    Pooler mode disables asyncpg's statement cache and names prepared
+    statements anonymously so transaction-mode PgBouncer works. Direct mode
+    caches prepared statements and registers pgvector's binary codec.
+    """
+    mode = mode or settings.db_connection_mode
+    if mode == "direct":
+        connect_args = {"prepared_statement_cache_size": settings.db_statement_cache_size}
+    else:
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: "",
+        }
+
+    engine = create_async_engine(db_url, echo=False, connect_args=connect_args, **kwargs)
+    if mode == "direct":
+        event.listen(engine.sync_engine, "connect", _on_connect)
+    return engine
+
+
+engine = create_db_engine(
     settings.supabase_db_url,
-    echo=False,
     pool_size=5,
     max_overflow=10,
-    connect_args={
-        "statement_cache_size": 0,
-        "prepared_statement_name_func": lambda: "",
-    },
 )
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
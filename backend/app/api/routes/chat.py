@@ -1,15 +1,20 @@
+import asyncio
 import json
 import logging
 import re
 import time
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.api.deps import get_db
+from app.api.deps import async_session
 from app.models.schemas import ChatRequest
 from app.services.retriever import retrieve_chunks
 from app.services.generator import stream_rag_response
+from app.services.conversation import conversation_store
+from app.core.metrics import metrics
 from app.core.streaming import (
+    ClientDisconnected,
+    stream_until_disconnect,
+    create_session_event,
     create_token_event,
     create_citations_event,
     create_done_event,
@@ -34,19 +39,30 @@ def _extract_cited_sources(text: str) -> set[tuple[str, int]]:
 @router.post("/chat")
 async def chat(
     request: ChatRequest,
-    db: AsyncSession = Depends(get_db),
+    http_request: Request,
 ):
     """Chat endpoint with RAG retrieval and streaming Gemini response."""
 
+    chat_history = None
+    if request.chat_history:
+        chat_history = [msg.model_dump() for msg in request.chat_history]
+    conversation = conversation_store.get_or_create(request.session_id, chat_history)
+
     async def event_generator():
+        metrics.incr("chat_requests")
+        generating = False
         try:
-            # 1. Retrieve relevant chunks (embedding + pgvector search)
+            yield await create_session_event(conversation.id)
+
+            # 1. Retrieve relevant chunks (embedding + pgvector search).
+            # The DB session is held only for retrieval, not for the whole stream.
             t0 = time.perf_counter()
-            chunks = await retrieve_chunks(
-                query=request.query,
-                db=db,
-                document_ids=request.document_ids,
-            )
+            async with async_session() as db:
+                chunks = await retrieve_chunks(
+                    query=request.query,
+                    db=db,
+                    document_ids=request.document_ids,
+                )
             t1 = time.perf_counter()
             logger.warning(f"⏱ RETRIEVAL (embed + pgvector) took {t1 - t0:.2f}s")
 
@@ -59,18 +75,18 @@ async def chat(
                 return
 
             # 2. Stream response from LLM, collecting full text for citation parsing
-            chat_history = None
-            if request.chat_history:
-                chat_history = [msg.model_dump() for msg in request.chat_history]
-
             t2 = time.perf_counter()
             first_token = True
             full_response = ""
-            async for token in stream_rag_response(
+            generating = True
+            metrics.incr("generations_started")
+            token_stream = stream_rag_response(
                 query=request.query,
                 chunks=chunks,
-                chat_history=chat_history,
-            ):
+                chat_history=list(conversation.messages),
+                summary=conversation.summary,
+            )
+            async for token in stream_until_disconnect(http_request, token_stream):
                 if first_token:
                     t3 = time.perf_counter()
                     logger.warning(f"⏱ LLM first token took {t3 - t2:.2f}s")
@@ -78,6 +94,10 @@ async def chat(
                 full_response += token
                 yield await create_token_event(token)
 
+            generating = False
+            metrics.incr("generations_completed")
+            conversation_store.add_turn(conversation, request.query, full_response)
+
             # 3. Emit only the citations the LLM actually referenced
             cited = _extract_cited_sources(full_response)
 
@@ -111,7 +131,17 @@ async def chat(
             # 4. Done
             yield await create_done_event()
 
+        except (ClientDisconnected, asyncio.CancelledError) as e:
+            # Client closed the tab: the Ollama stream has been closed, stop here
+            metrics.incr("chat_disconnects")
+            if generating:
+                metrics.incr("generations_cancelled")
+                logger.info("Client disconnected, generation cancelled")
+            if isinstance(e, asyncio.CancelledError):
+                raise
+
         except Exception as e:
+            metrics.incr("chat_errors")
             logger.error(f"Chat error: {e}")
             yield await create_error_event(f"An error occurred: {str(e)}")
             yield await create_done_event()
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy import select, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_db
-from app.models.database import Document, Chunk
-from app.models.schemas import DocumentListResponse, DocumentListItem
+from app.config import get_settings
+from app.models.database import Document, Chunk, DocumentText
+from app.models.schemas import DocumentListResponse, DocumentListItem, RechunkRequest
+from app.services.ingest import rechunk_document
+from app.services.retrieval_cache import bump_corpus_version
 
 router = APIRouter()
+settings = get_settings()
 
 
 @router.get("/documents", response_model=DocumentListResponse)
@@ -81,10 +85,64 @@ async def delete_document(
     doc = result.scalar_one_or_none()
 
     if not doc:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Document not found")
 
     await db.delete(doc)
+    await bump_corpus_version(db)
     await db.commit()
 
     return {"message": f"Document {document_id} deleted successfully"}
+
+
+@router.post("/documents/{document_id}/rechunk", status_code=202)
+async def rechunk(
+    document_id: str,
+    background_tasks: BackgroundTasks,
+    request: RechunkRequest | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Rebuild a document's chunks from its stored page text (no re-upload needed)."""
+    chunk_size = (request and request.chunk_size) or settings.chunk_size
+    chunk_overlap = settings.chunk_overlap
+    if request and request.chunk_overlap is not None:
+        chunk_overlap = request.chunk_overlap
+    if chunk_overlap >= chunk_size:
+        raise HTTPException(status_code=400, detail="chunk_overlap must be smaller than chunk_size")
+
+    result = await db.execute(
+        select(Document).where(Document.id == document_id)
+    )
+    doc = result.scalar_one_or_none()
+
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if doc.status == "processing":
+        raise HTTPException(status_code=409, detail="Document is still being processed")
+
+    has_text = await db.scalar(
+        select(func.count()).select_from(DocumentText).where(DocumentText.document_id == doc.id)
+    )
+    if not has_text:
+        raise HTTPException(
+            status_code=409,
+            detail="No stored page text for this document; re-upload it to enable re-chunking",
+        )
+
+    previous_status = doc.status
+    doc.status = "processing"
+    await db.commit()
+
+    background_tasks.add_task(
+        rechunk_document,
+        doc.id,
+        chunk_size,
+        chunk_overlap,
+        previous_status,
+        settings.supabase_db_url,
+    )
+
+    return {
+        "message": f"Re-chunking document {document_id}",
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+    }
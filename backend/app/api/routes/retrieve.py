@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_db
+from app.models.schemas import BatchRetrieveRequest, BatchRetrieveResponse, QueryRetrievalResult
+from app.services.retriever import parse_document_ids, retrieve_chunks_batch
+
+router = APIRouter()
+
+
+@router.post("/retrieve/batch", response_model=BatchRetrieveResponse)
+async def retrieve_batch(
+    request: BatchRetrieveRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Retrieve top-k chunks for many queries in one embedding pass and one SQL round trip."""
+    if any(not q.strip() for q in request.queries):
+        raise HTTPException(status_code=400, detail="Queries must not be empty")
+
+    try:
+        parse_document_ids(request.document_ids)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid document id")
+
+    results = await retrieve_chunks_batch(
+        queries=request.queries,
+        db=db,
+        document_ids=request.document_ids,
+        top_k=request.top_k,
+    )
+
+    return BatchRetrieveResponse(
+        results=[
+            QueryRetrievalResult(query=query, chunks=chunks)
+            for query, chunks in zip(request.queries, results)
+        ]
+    )
@@ -0,0 +1,42 @@
+import asyncio
+from collections import Counter
+
+
+class Metrics:
+    """Process-local counters exposed at /metrics."""
+
+    def __init__(self):
+        self.counters: Counter[str] = Counter()
+        self.loop_lag_samples = 0
+        self.loop_lag_total_s = 0.0
+        self.loop_lag_max_s = 0.0
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def observe_loop_lag(self, lag_s: float) -> None:
+        self.loop_lag_samples += 1
+        self.loop_lag_total_s += lag_s
+        self.loop_lag_max_s = max(self.loop_lag_max_s, lag_s)
+
+    def snapshot(self) -> dict:
+        return dict(self.counters)
+
+    def loop_lag_snapshot(self) -> dict:
+        return {
+            "samples": self.loop_lag_samples,
+            "total_ms": round(self.loop_lag_total_s * 1000, 3),
+            "max_ms": round(self.loop_lag_max_s * 1000, 3),
+        }
+
+
+metrics = Metrics()
+
+
+async def monitor_loop_lag(interval_s: float) -> None:
+    """Measure how late the event loop wakes a sleeping task — a proxy for blocked-loop time."""
+    loop = asyncio.get_running_loop()
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(interval_s)
+        metrics.observe_loop_lag(max(0.0, loop.time() - t0 - interval_s))
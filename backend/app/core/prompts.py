@@ -7,14 +7,27 @@ SYSTEM_PROMPT = """You are a helpful research assistant. Answer the user's quest
 5. Structure long answers with bullet points or numbered lists.
 6. Be concise but thorough."""
 
+# Earlier turns are sent as separate chat messages before this one, so the
+# system prompt + history form a prefix that stays identical across follow-ups.
 RAG_USER_TEMPLATE = """## Context
 {context}
 
-## Conversation History
-{chat_history}
-
 ## User Question
 {query}
 
 ## Instructions
 Answer the question based on the context above. Cite sources as [Source: filename, Page N]."""
+
+HISTORY_SUMMARY_TEMPLATE = """## Summary of Earlier Conversation
+{summary}"""
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a conversation between a user and a research assistant that answers questions about uploaded PDF documents. Keep the topics asked about, the key facts given in answers, and any filenames and page numbers cited. Write plain prose, at most 150 words."""
+
+SUMMARY_USER_TEMPLATE = """## Current Summary
+{summary}
+
+## New Messages
+{messages}
+
+## Instructions
+Rewrite the summary so it also covers the new messages. Output only the updated summary."""
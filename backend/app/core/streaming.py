@@ -1,5 +1,15 @@
+import asyncio
 import json
 from typing import AsyncGenerator
+import anyio
+from starlette.requests import Request
+
+# How often to check whether the SSE client is still connected
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
+class ClientDisconnected(Exception):
+    """The client went away while a response was being generated."""
 
 
 async def sse_event(data: dict) -> str:
@@ -7,6 +17,10 @@ async def sse_event(data: dict) -> str:
     return f"data: {json.dumps(data)}\n\n"
 
 
+async def create_session_event(session_id: str) -> str:
+    return await sse_event({"type": "session", "session_id": session_id})
+
+
 async def create_token_event(content: str) -> str:
     return await sse_event({"type": "token", "content": content})
 
@@ -21,3 +35,41 @@ async def create_done_event() -> str:
 
 async def create_error_event(message: str) -> str:
     return await sse_event({"type": "error", "content": message})
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def stream_until_disconnect(request: Request, source: AsyncGenerator) -> AsyncGenerator:
+    """
+    Yield items from source until the client disconnects.
+
+    On disconnect the pending read is cancelled and source is closed, which
+    closes its upstream connection (e.g. the Ollama stream), then
+    ClientDisconnected is raised. Works while source is silent too, e.g.
+    during a long time-to-first-token.
+    """
+    watcher = asyncio.create_task(_wait_for_disconnect(request))
+    next_item = None
+    try:
+        while True:
+            next_item = asyncio.ensure_future(source.__anext__())
+            await asyncio.wait({next_item, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_item.done():
+                raise ClientDisconnected()
+            try:
+                item = next_item.result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        # Also reached when the response task itself is cancelled; shield the
+        # cleanup so the upstream stream is closed in every case.
+        with anyio.CancelScope(shield=True):
+            watcher.cancel()
+            if next_item is not None and not next_item.done():
+                next_item.cancel()
+                await asyncio.gather(next_item, return_exceptions=True)
+            await source.aclose()
@@ -1,12 +1,19 @@
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from sqlalchemy import text as sql_text
 from app.config import get_settings
 from app.api.deps import engine
+from app.core.metrics import metrics, monitor_loop_lag
 from app.models.database import Base
-from app.api.routes import upload, chat, documents
+from app.api.routes import upload, chat, documents, retrieve
+from app.services.embedder import warm_up
+from app.services.generator import ping_llm
+from app.services.retrieval_cache import retrieval_cache
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -15,10 +22,52 @@ settings = get_settings()
 logging.basicConfig(level=logging.INFO)
 
 
+async def warm_up_services(app: FastAPI, started_at: float):
+    """
+    Load and warm up the embedder (and optionally the LLM), then mark the app ready.
+
+    Failed embedder warm-ups are retried with exponential backoff until one
+    succeeds — e.g. while a shared embedding server is still downloading the
+    model — so a transient failure never keeps the instance out of rotation.
+    """
+    timings = app.state.startup_timings
+    delay = 1.0
+    while True:
+        try:
+            t0 = time.perf_counter()
+            await asyncio.get_running_loop().run_in_executor(None, warm_up)
+            timings["embedder_warmup_s"] = round(time.perf_counter() - t0, 3)
+            break
+        except Exception as e:
+            app.state.startup_error = str(e)
+            app.state.warmup_attempts += 1
+            logger.error(f"Warm-up attempt {app.state.warmup_attempts} failed, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.startup_retry_max_s)
+
+    if settings.startup_ping_llm:
+        t0 = time.perf_counter()
+        try:
+            await ping_llm()
+            timings["llm_ping_s"] = round(time.perf_counter() - t0, 3)
+        except Exception as e:
+            # The LLM is optional for readiness — retrieval still works without it
+            logger.warning(f"LLM warm-up failed: {e}")
+
+    timings["ready_s"] = round(time.perf_counter() - started_at, 3)
+    app.state.ready = True
+    logger.info(f"Warm-up complete: {timings}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """App startup/shutdown lifecycle."""
     logger.info("Starting PDF RAG Chatbot API...")
+    started_at = time.perf_counter()
+    app.state.ready = False
+    app.state.startup_error = None
+    app.state.warmup_attempts = 0
+    app.state.startup_timings = {}
 
     # Create tables if they don't exist
     async with engine.begin() as conn:
@@ -26,11 +75,37 @@ async def lifespan(app: FastAPI):
         await conn.execute(sql_text("CREATE EXTENSION IF NOT EXISTS vector"))
         # Create tables
         await conn.run_sync(Base.metadata.create_all)
+        # create_all skips indexes on tables that already exist
+        await conn.execute(sql_text("CREATE INDEX IF NOT EXISTS ix_chunks_document_id ON chunks (document_id)"))
+        await conn.execute(sql_text(
+            "INSERT INTO corpus_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING"
+        ))
+
+    if settings.db_connection_mode == "direct":
+        # Connections opened before the extension existed have no vector codec
+        await engine.dispose()
 
     logger.info("Database tables ready.")
+    app.state.startup_timings["database_s"] = round(time.perf_counter() - started_at, 3)
+
+    lag_task = None
+    if settings.loop_lag_interval_ms > 0:
+        lag_task = asyncio.create_task(monitor_loop_lag(settings.loop_lag_interval_ms / 1000))
+
+    # Warm up in the background so the server accepts /health immediately
+    warmup_task = None
+    if settings.startup_warmup:
+        warmup_task = asyncio.create_task(warm_up_services(app, started_at))
+    else:
+        app.state.ready = True
+
     yield
 
     # Shutdown
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    if lag_task is not None:
+        lag_task.cancel()
     await engine.dispose()
     logger.info("Shutdown complete.")
 
@@ -56,8 +131,35 @@ app.add_middleware(
 app.include_router(upload.router, prefix="/api", tags=["Upload"])
 app.include_router(chat.router, prefix="/api", tags=["Chat"])
 app.include_router(documents.router, prefix="/api", tags=["Documents"])
+app.include_router(retrieve.router, prefix="/api", tags=["Retrieval"])
 
 
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+
+@app.get("/ready")
+async def readiness_check(request: Request):
+    """Readiness probe: 200 only once the embedder is loaded and warmed up."""
+    state = request.app.state
+    # Attributes are set by lifespan; before it has run the app is still starting
+    body = {"startup_timings": getattr(state, "startup_timings", {})}
+    if getattr(state, "ready", False):
+        return {"status": "ready", **body}
+    # Warm-up keeps retrying; the last failure is reported for diagnosis only
+    error = getattr(state, "startup_error", None)
+    if error:
+        body["last_error"] = error
+        body["failed_attempts"] = getattr(state, "warmup_attempts", 0)
+    return JSONResponse(status_code=503, content={"status": "starting", **body})
+
+
+@app.get("/metrics")
+async def metrics_snapshot():
+    """Process-local counters (per worker)."""
+    return {
+        "counters": metrics.snapshot(),
+        "loop_lag": metrics.loop_lag_snapshot(),
+        "retrieval_cache": retrieval_cache.stats(),
+    }
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, BigInteger, Integer, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, BigInteger, Integer, Text, DateTime, ForeignKey, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, relationship
 from pgvector.sqlalchemy import Vector
@@ -27,7 +27,7 @@ class Chunk(Base):
     __tablename__ = "chunks"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
     source_file = Column(Text, nullable=False)
     page_number = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
@@ -36,3 +36,22 @@ class Chunk(Base):
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
 
     document = relationship("Document", back_populates="chunks")
+
+
+class DocumentText(Base):
+    """Extracted page text of a document, kept so it can be re-chunked without the PDF."""
+
+    __tablename__ = "document_texts"
+
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+    data = Column(LargeBinary, nullable=False)  # see app.services.page_store
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class CorpusVersion(Base):
+    """Single-row counter bumped whenever chunks change; keys the retrieval cache."""
+
+    __tablename__ = "corpus_version"
+
+    id = Column(Integer, primary_key=True, default=1)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -39,6 +39,11 @@ class DocumentListResponse(BaseModel):
     limit: int
 
 
+class RechunkRequest(BaseModel):
+    chunk_size: Optional[int] = Field(None, ge=50, le=8000)
+    chunk_overlap: Optional[int] = Field(None, ge=0, le=4000)
+
+
 # --- Chat ---
 class ChatMessage(BaseModel):
     role: str
@@ -49,6 +54,7 @@ class ChatRequest(BaseModel):
     query: str = Field(..., min_length=1)
     document_ids: Optional[list[str]] = None
     chat_history: Optional[list[ChatMessage]] = None
+    session_id: Optional[str] = None
 
 
 class CitationSource(BaseModel):
@@ -57,6 +63,32 @@ class CitationSource(BaseModel):
 
 
 class ChatEvent(BaseModel):
-    type: str  # "token", "citations", "done", "error"
+    type: str  # "session", "token", "citations", "done", "error"
     content: Optional[str] = None
     sources: Optional[list[CitationSource]] = None
+    session_id: Optional[str] = None
+
+
+# --- Retrieval ---
+class BatchRetrieveRequest(BaseModel):
+    queries: list[str] = Field(..., min_length=1, max_length=5000)
+    document_ids: Optional[list[str]] = None
+    top_k: Optional[int] = Field(None, ge=1, le=100)
+
+
+class RetrievedChunk(BaseModel):
+    id: str
+    document_id: str
+    source_file: str
+    page_number: int
+    content: str
+    similarity: float
+
+
+class QueryRetrievalResult(BaseModel):
+    query: str
+    chunks: list[RetrievedChunk]
+
+
+class BatchRetrieveResponse(BaseModel):
+    results: list[QueryRetrievalResult]
@@ -1,20 +1,34 @@
+from functools import lru_cache
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from app.config import get_settings
 
 settings = get_settings()
 
 
-def chunk_text(text: str, page_number: int, document_id: str, source_file: str) -> list[dict]:
-    """
-    Split text into chunks and return metadata-enriched chunk dicts.
-    """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=settings.chunk_size,
-        chunk_overlap=settings.chunk_overlap,
+@lru_cache(maxsize=8)
+def get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Return a shared splitter for these parameters (splitters are stateless)."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
         separators=["\n\n", "\n", ". ", " "],
         length_function=len,
     )
 
+
+def chunk_text(
+    text: str,
+    page_number: int,
+    document_id: str,
+    source_file: str,
+    splitter: RecursiveCharacterTextSplitter | None = None,
+) -> list[dict]:
+    """
+    Split text into chunks and return metadata-enriched chunk dicts.
+    """
+    if splitter is None:
+        splitter = get_splitter(settings.chunk_size, settings.chunk_overlap)
+
     chunks = splitter.split_text(text)
 
     return [
@@ -33,10 +47,16 @@ def chunk_pages(
     pages: list[tuple[int, str]],
     document_id: str,
     source_file: str,
+    chunk_size: int | None = None,
+    chunk_overlap: int | None = None,
 ) -> list[dict]:
-    """Chunk all pages of a document."""
+    """Chunk all pages of a document with one splitter (defaults from settings)."""
+    splitter = get_splitter(
+        chunk_size if chunk_size is not None else settings.chunk_size,
+        chunk_overlap if chunk_overlap is not None else settings.chunk_overlap,
+    )
     all_chunks = []
     for page_number, text in pages:
-        page_chunks = chunk_text(text, page_number, document_id, source_file)
+        page_chunks = chunk_text(text, page_number, document_id, source_file, splitter)
         all_chunks.extend(page_chunks)
     return all_chunks
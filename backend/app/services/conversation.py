@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from app.services.generator import summarize_history
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class Conversation:
+    """Server-side chat state: a rolling summary plus the recent raw messages."""
+
+    id: str
+    messages: list[dict] = field(default_factory=list)
+    summary: str = ""
+    updated_at: float = field(default_factory=time.monotonic)
+    summarizing: bool = False
+
+
+class ConversationStore:
+    """
+    In-process LRU of conversations with idle expiry.
+
+    Unknown or expired ids start a fresh conversation (seeded from the
+    client-sent history), so a restart or a request landing on another
+    worker degrades to the stateless behaviour instead of failing.
+    """
+
+    def __init__(self, max_count: int, ttl_s: float):
+        self.max_count = max_count
+        self.ttl_s = ttl_s
+        self._conversations: OrderedDict[str, Conversation] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+
+    def get_or_create(
+        self,
+        session_id: str | None,
+        chat_history: list[dict] | None = None,
+    ) -> Conversation:
+        now = time.monotonic()
+        conversation = self._conversations.get(session_id) if session_id else None
+        if conversation is not None and now - conversation.updated_at > self.ttl_s:
+            del self._conversations[session_id]
+            conversation = None
+
+        if conversation is None:
+            conversation = Conversation(id=str(uuid.uuid4()))
+            if chat_history:
+                conversation.messages = list(chat_history[-settings.history_recent_messages:])
+            self._conversations[conversation.id] = conversation
+
+        conversation.updated_at = now
+        self._conversations.move_to_end(conversation.id)
+        while len(self._conversations) > self.max_count:
+            self._conversations.popitem(last=False)
+        return conversation
+
+    def add_turn(self, conversation: Conversation, query: str, answer: str) -> None:
+        """Record a completed turn and fold old messages into the summary if needed."""
+        conversation.messages.append({"role": "user", "content": query})
+        conversation.messages.append({"role": "assistant", "content": answer})
+        conversation.updated_at = time.monotonic()
+
+        if len(conversation.messages) > settings.history_max_messages and not conversation.summarizing:
+            conversation.summarizing = True
+            task = asyncio.create_task(self._fold_old_messages(conversation))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fold_old_messages(self, conversation: Conversation) -> None:
+        # Folding happens in batches (max - recent messages at a time) after the
+        # answer has been sent, so the prompt prefix only changes occasionally
+        # and no request waits on the summary.
+        try:
+            cut = len(conversation.messages) - settings.history_recent_messages
+            old = conversation.messages[:cut]
+            conversation.summary = await summarize_history(conversation.summary, old)
+            # Messages appended meanwhile stay after the cut
+            del conversation.messages[:cut]
+        except Exception as e:
+            logger.error(f"Summarizing conversation {conversation.id} failed: {e}")
+            # Keep the prompt bounded even without a summary
+            del conversation.messages[:-settings.history_max_messages]
+        finally:
+            conversation.summarizing = False
+
+
+conversation_store = ConversationStore(settings.session_max_count, settings.session_ttl_s)
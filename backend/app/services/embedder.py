@@ -1,43 +1,74 @@
+import threading
 import numpy as np
-import torch
-
-# Monkey-patch: torch.mps.device_count doesn't exist in PyTorch 2.2.x
-# but FlagEmbedding 1.3.3 calls it on macOS. Return 0 to force CPU fallback.
-if not hasattr(torch.mps, "device_count"):
-    torch.mps.device_count = lambda: 0
-
-from FlagEmbedding import BGEM3FlagModel
 from app.config import get_settings
+from app.services.embedding_client import encode_remote
 
 settings = get_settings()
 
 _model = None
+_model_lock = threading.Lock()
 
 
-def get_model() -> BGEM3FlagModel:
-    """Lazy-load the BGE-M3 model (singleton)."""
+def get_model():
+    """
+    Lazy-load the BGE-M3 model (singleton).
+
+    torch and FlagEmbedding are imported here rather than at module level so
+    the API process starts without paying for them; the lock keeps the startup
+    warm-up and an early request from loading two copies.
+    """
     global _model
     if _model is None:
-        _model = BGEM3FlagModel(settings.embedding_model, use_fp16=False, devices=["cpu"])
+        with _model_lock:
+            if _model is None:
+                import torch
+
+                # Monkey-patch: torch.mps.device_count doesn't exist in PyTorch 2.2.x
+                # but FlagEmbedding 1.3.3 calls it on macOS. Return 0 to force CPU fallback.
+                if not hasattr(torch.mps, "device_count"):
+                    torch.mps.device_count = lambda: 0
+
+                from FlagEmbedding import BGEM3FlagModel
+
+                _model = BGEM3FlagModel(settings.embedding_model, use_fp16=False, devices=["cpu"])
     return _model
 
 
-def embed_texts(texts: list[str], batch_size: int = 32) -> list[list[float]]:
+def warm_up() -> None:
+    """Load the model (or reach the embedding server) with one tiny encode so the first real request is fast."""
+    embed_texts(["warm-up"], batch_size=1)
+
+
+def encode_local(texts: list[str], batch_size: int = 32) -> np.ndarray:
+    """Encode texts with the in-process model into a (n, dim) float32 array."""
+    model = get_model()
+    result = model.encode(texts, batch_size=batch_size, max_length=512)
+    return np.ascontiguousarray(result["dense_vecs"], dtype=np.float32)
+
+
+def embed_texts(texts: list[str], batch_size: int = 32, normalize: bool = False) -> np.ndarray:
     """
     Generate dense embeddings for a list of texts using BGE-M3.
-    Returns a list of embedding vectors (each 1024-dim).
+    Returns a contiguous (len(texts), 1024) float32 array — 4 bytes per value,
+    rows can be passed straight to pgvector.
+
+    Goes through the shared embedding server when EMBEDDING_SERVER_SOCKET is
+    set (it does its own batching), otherwise encodes in-process. BGE-M3
+    already L2-normalizes its dense vectors; normalize=True re-normalizes in
+    place for models that don't.
     """
-    model = get_model()
-    result = model.encode(texts, batch_size=batch_size, max_length=512)
-    dense_vecs = result["dense_vecs"]
+    if settings.embedding_server_socket:
+        dense_vecs = encode_remote(texts)
+    else:
+        dense_vecs = encode_local(texts, batch_size=batch_size)
 
-    # Convert numpy arrays to lists for database storage
-    if isinstance(dense_vecs, np.ndarray):
-        return dense_vecs.tolist()
-    return [vec.tolist() if isinstance(vec, np.ndarray) else vec for vec in dense_vecs]
+    if normalize:
+        norms = np.linalg.norm(dense_vecs, axis=1, keepdims=True)
+        np.maximum(norms, np.finfo(np.float32).tiny, out=norms)
+        dense_vecs /= norms
+    return dense_vecs
 
 
-def embed_query(query: str) -> list[float]:
-    """Embed a single query string."""
-    embeddings = embed_texts([query])
-    return embeddings[0]
+def embed_query(query: str) -> np.ndarray:
+    """Embed a single query string into a 1-D float32 array."""
+    return embed_texts([query])[0]
@@ -0,0 +1,76 @@
+import json
+import socket
+import struct
+import time
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from app.config import get_settings
+
+settings = get_settings()
+
+# Messages on the embedding server socket are a 4-byte big-endian length
+# followed by a UTF-8 JSON body. Vectors never travel over the socket: the
+# client allocates a shared-memory block and the server writes into it.
+HEADER = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+def encode_message(payload: dict) -> bytes:
+    """Frame a JSON payload for the socket."""
+    body = json.dumps(payload).encode("utf-8")
+    return HEADER.pack(len(body)) + body
+
+
+def decode_message(body: bytes) -> dict:
+    return json.loads(body.decode("utf-8"))
+
+
+def _recv_exactly(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        part = sock.recv(n - len(buf))
+        if not part:
+            raise ConnectionError("Embedding server closed the connection")
+        buf.extend(part)
+    return bytes(buf)
+
+
+def _connect(path: str, timeout: float) -> socket.socket:
+    """Connect to the server, retrying while it is starting up or restarting."""
+    deadline = time.monotonic() + timeout
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+            return sock
+        except (FileNotFoundError, ConnectionRefusedError):
+            sock.close()
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+
+
+def encode_remote(texts: list[str]) -> np.ndarray:
+    """
+    Embed texts through the shared embedding server.
+    Returns a (len(texts), embedding_dim) float32 array.
+    """
+    dim = settings.embedding_dim
+    shm = SharedMemory(create=True, size=max(len(texts) * dim * 4, 1))
+    try:
+        with _connect(settings.embedding_server_socket, settings.embedding_server_timeout_s) as sock:
+            sock.sendall(encode_message({"texts": texts, "shm": shm.name, "dim": dim}))
+            (length,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+            response = decode_message(_recv_exactly(sock, length))
+
+        if not response.get("ok"):
+            raise RuntimeError(f"Embedding server error: {response.get('error')}")
+
+        view = np.ndarray((len(texts), dim), dtype=np.float32, buffer=shm.buf)
+        vecs = view.copy()
+        del view  # release the buffer export before closing the block
+        return vecs
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,175 @@
+"""
+Standalone embedding server shared by all API workers.
+
+Loads BGE-M3 once and serves embed requests over a Unix socket, so
+`uvicorn --workers N` keeps a single model copy instead of N. Requests that
+arrive within a few milliseconds of each other are encoded as one batch, and
+result vectors are written straight into a shared-memory block owned by the
+calling worker.
+
+Run it next to the API and point the workers at the same socket:
+
+    python -m app.services.embedding_server --socket /tmp/rag-embedder.sock
+    EMBEDDING_SERVER_SOCKET=/tmp/rag-embedder.sock uvicorn app.main:app --workers 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from app.config import get_settings
+from app.services.embedder import encode_local
+from app.services.embedding_client import (
+    HEADER,
+    MAX_MESSAGE_BYTES,
+    decode_message,
+    encode_message,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class Batcher:
+    """Collects concurrent embed requests and encodes them together."""
+
+    def __init__(self, max_batch: int, wait_s: float):
+        self.max_batch = max_batch
+        self.wait_s = wait_s
+        self.queue: asyncio.Queue[tuple[list[str], asyncio.Future]] = asyncio.Queue()
+
+    async def submit(self, texts: list[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            count = len(items[0][0])
+
+            # Wait briefly for more requests to share this batch
+            deadline = loop.time() + self.wait_s
+            while count < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                count += len(item[0])
+
+            texts = [t for item_texts, _ in items for t in item_texts]
+            try:
+                # One encode at a time: the model already uses every core
+                vecs = await loop.run_in_executor(None, encode_local, texts)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(texts)} failed: {e}")
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for item_texts, future in items:
+                if not future.done():
+                    future.set_result(vecs[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+
+def _write_to_shm(name: str, vecs: np.ndarray) -> None:
+    """Copy vectors into the client's shared-memory block."""
+    shm = SharedMemory(name=name)
+    # The client owns (and unlinks) the block; stop our resource tracker
+    # from unlinking it again when this process exits.
+    resource_tracker.unregister(shm._name, "shared_memory")
+    try:
+        if shm.size < vecs.nbytes:
+            raise ValueError(f"Shared memory block too small ({shm.size} < {vecs.nbytes})")
+        view = np.ndarray(vecs.shape, dtype=np.float32, buffer=shm.buf)
+        view[:] = vecs
+        del view
+    finally:
+        shm.close()
+
+
+def make_handler(batcher: Batcher):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    (length,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                except asyncio.IncompleteReadError:
+                    break
+                if length > MAX_MESSAGE_BYTES:
+                    logger.warning(f"Dropping client: message of {length} bytes")
+                    break
+                request = decode_message(await reader.readexactly(length))
+
+                try:
+                    if request.get("dim") != settings.embedding_dim:
+                        raise ValueError(
+                            f"Client expects dim {request.get('dim')}, server has {settings.embedding_dim}"
+                        )
+                    vecs = await batcher.submit(request["texts"])
+                    _write_to_shm(request["shm"], vecs)
+                    response = {"ok": True, "count": len(vecs)}
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+
+                writer.write(encode_message(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def serve(socket_path: str):
+    loop = asyncio.get_running_loop()
+    logger.info("Loading embedding model...")
+    # Always encode locally here, even if EMBEDDING_SERVER_SOCKET is set in the shared .env
+    await loop.run_in_executor(None, encode_local, ["warm-up"])
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    batcher = Batcher(
+        max_batch=settings.embedding_server_max_batch,
+        wait_s=settings.embedding_server_batch_wait_ms / 1000,
+    )
+    batch_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_unix_server(make_handler(batcher), path=socket_path)
+    logger.info(f"Embedding server listening on {socket_path}")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared BGE-M3 embedding server")
+    parser.add_argument(
+        "--socket",
+        default=settings.embedding_server_socket or "/tmp/rag-embedder.sock",
+        help="Unix socket path to listen on",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.socket))
+
+
+if __name__ == "__main__":
+    main()
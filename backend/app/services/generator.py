@@ -2,7 +2,13 @@ import asyncio
 import logging
 from typing import AsyncGenerator
 import ollama
-from app.core.prompts import SYSTEM_PROMPT, RAG_USER_TEMPLATE
+from app.core.prompts import (
+    SYSTEM_PROMPT,
+    RAG_USER_TEMPLATE,
+    HISTORY_SUMMARY_TEMPLATE,
+    SUMMARY_SYSTEM_PROMPT,
+    SUMMARY_USER_TEMPLATE,
+)
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -11,6 +17,12 @@ settings = get_settings()
 OLLAMA_MODEL = "llama3.2:3b"
 
 
+async def ping_llm() -> None:
+    """Ask Ollama to load the model into memory (an empty prompt only loads it)."""
+    client = ollama.AsyncClient()
+    await client.generate(model=OLLAMA_MODEL, prompt="", keep_alive=settings.ollama_keep_alive)
+
+
 def format_context(chunks: list[dict]) -> str:
     """Format retrieved chunks into a context string with source attribution."""
     parts = []
@@ -22,53 +34,100 @@ def format_context(chunks: list[dict]) -> str:
     return "\n\n".join(parts)
 
 
-def format_chat_history(chat_history: list[dict] | None) -> str:
-    """Format chat history into a string."""
+def format_chat_history(chat_history: list[dict] | None) -> list[dict]:
+    """Turn chat history into user/assistant chat messages."""
     if not chat_history:
-        return "No previous conversation."
+        return []
 
-    # Keep last 3 turns
-    recent = chat_history[-6:]
-    parts = []
-    for msg in recent:
-        role = msg.get("role", "user").capitalize()
-        parts.append(f"{role}: {msg.get('content', '')}")
-    return "\n".join(parts)
+    return [
+        {
+            "role": "assistant" if msg.get("role") == "assistant" else "user",
+            "content": msg.get("content", ""),
+        }
+        for msg in chat_history
+    ]
 
 
-async def stream_rag_response(
+def build_messages(
     query: str,
     chunks: list[dict],
     chat_history: list[dict] | None = None,
-) -> AsyncGenerator[str, None]:
-    """Stream tokens from Ollama with RAG context."""
-    context = format_context(chunks)
-    history = format_chat_history(chat_history)
+    summary: str | None = None,
+) -> list[dict]:
+    """
+    Lay out the prompt as system prompt, summary, past turns, then context +
+    question. Everything before the last message is unchanged between
+    follow-ups, so Ollama can reuse its KV cache for that prefix. The summary
+    is its own message so a fold never changes the system prompt itself.
+    """
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if summary:
+        messages.append({
+            "role": "system",
+            "content": HISTORY_SUMMARY_TEMPLATE.format(summary=summary),
+        })
 
-    # Build the user message from the RAG template
     user_message = RAG_USER_TEMPLATE.format(
-        context=context,
-        chat_history=history,
+        context=format_context(chunks),
         query=query,
     )
 
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
+    return [
+        *messages,
+        *format_chat_history(chat_history),
         {"role": "user", "content": user_message},
     ]
 
+
+async def summarize_history(summary: str, messages: list[dict]) -> str:
+    """Fold messages into the running conversation summary."""
+    transcript = "\n".join(
+        f"{msg.get('role', 'user').capitalize()}: {msg.get('content', '')}" for msg in messages
+    )
+    client = ollama.AsyncClient()
+    response = await client.chat(
+        model=OLLAMA_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": SUMMARY_USER_TEMPLATE.format(
+                    summary=summary or "(none yet)",
+                    messages=transcript,
+                ),
+            },
+        ],
+        keep_alive=settings.ollama_keep_alive,
+    )
+    return response["message"]["content"].strip()
+
+
+async def stream_rag_response(
+    query: str,
+    chunks: list[dict],
+    chat_history: list[dict] | None = None,
+    summary: str | None = None,
+) -> AsyncGenerator[str, None]:
+    """Stream tokens from Ollama with RAG context."""
+    messages = build_messages(query, chunks, chat_history, summary)
+
     try:
         client = ollama.AsyncClient()
         stream = await client.chat(
             model=OLLAMA_MODEL,
             messages=messages,
             stream=True,
+            keep_alive=settings.ollama_keep_alive,
         )
 
-        async for chunk in stream:
-            content = chunk.get("message", {}).get("content", "")
-            if content:
-                yield content
+        try:
+            async for chunk in stream:
+                content = chunk.get("message", {}).get("content", "")
+                if content:
+                    yield content
+        finally:
+            # Closing the HTTP stream makes Ollama stop generating and free its slot
+            await stream.aclose()
 
     except Exception as e:
         logger.error(f"Ollama error: {e}")
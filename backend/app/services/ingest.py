@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.api.deps import create_db_engine
+from app.models.database import Document, Chunk, DocumentText
+from app.services.pdf_parser import extract_text_by_page
+from app.services.chunker import chunk_pages
+from app.services.embedder import embed_texts
+from app.services.page_store import pack_pages, unpack_pages
+from app.services.retrieval_cache import bump_corpus_version
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+async def insert_chunks(session: AsyncSession, document_id, all_chunks: list[dict]) -> int:
+    """
+    Embed and insert chunks in windows so only one window of float32 vectors
+    (and its ORM rows) is alive at a time; flushed rows are only weakly
+    referenced by the session until the caller commits.
+    """
+    loop = asyncio.get_running_loop()
+    chunk_count = 0
+    for start in range(0, len(all_chunks), settings.ingest_batch_size):
+        window = all_chunks[start:start + settings.ingest_batch_size]
+        texts = [c["content"] for c in window]
+        embeddings = await loop.run_in_executor(None, embed_texts, texts)
+
+        session.add_all([
+            Chunk(
+                document_id=document_id,
+                source_file=chunk_data["source_file"],
+                page_number=chunk_data["page_number"],
+                content=chunk_data["content"],
+                embedding=embedding,
+                chunk_index=chunk_data["chunk_index"],
+            )
+            for chunk_data, embedding in zip(window, embeddings)
+        ])
+        await session.flush()
+        chunk_count += len(window)
+        del embeddings
+    return chunk_count
+
+
+async def process_pdf(
+    pdf_bytes: bytes,
+    filename: str,
+    document_id: str,
+    db_url: str,
+):
+    """Background task to process a PDF: parse, chunk, embed, store."""
+    engine = create_db_engine(db_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as session:
+        try:
+            # 1. Extract text by page
+            pages = extract_text_by_page(pdf_bytes)
+
+            if not pages:
+                await session.execute(
+                    Document.__table__.update()
+                    .where(Document.__table__.c.id == document_id)
+                    .values(status="error")
+                )
+                await session.commit()
+                return
+
+            # Keep the extracted text so the document can be re-chunked later.
+            # Committed on its own so it survives a failure further down.
+            session.add(DocumentText(document_id=document_id, data=pack_pages(pages)))
+            await session.commit()
+
+            # 2. Chunk text
+            all_chunks = chunk_pages(pages, str(document_id), filename)
+
+            if not all_chunks:
+                await session.execute(
+                    Document.__table__.update()
+                    .where(Document.__table__.c.id == document_id)
+                    .values(status="error")
+                )
+                await session.commit()
+                return
+
+            # 3-4. Embed and insert chunks
+            chunk_count = await insert_chunks(session, document_id, all_chunks)
+
+            # 5. Mark document as ready
+            await session.execute(
+                Document.__table__.update()
+                .where(Document.__table__.c.id == document_id)
+                .values(status="ready")
+            )
+            await bump_corpus_version(session)
+            await session.commit()
+            logger.info(f"Processed {filename}: {chunk_count} chunks created")
+
+        except Exception as e:
+            logger.error(f"Error processing {filename}: {e}")
+            # Discard chunks already flushed in earlier windows
+            await session.rollback()
+            await session.execute(
+                Document.__table__.update()
+                .where(Document.__table__.c.id == document_id)
+                .values(status="error")
+            )
+            await session.commit()
+
+    await engine.dispose()
+
+
+async def rechunk_document(
+    document_id: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    previous_status: str,
+    db_url: str,
+):
+    """Background task to rebuild a document's chunks from its stored page text."""
+    engine = create_db_engine(db_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as session:
+        try:
+            doc = (await session.execute(
+                select(Document).where(Document.id == document_id)
+            )).scalar_one()
+            data = (await session.execute(
+                select(DocumentText.data).where(DocumentText.document_id == document_id)
+            )).scalar_one()
+
+            all_chunks = chunk_pages(
+                unpack_pages(data), str(document_id), doc.filename, chunk_size, chunk_overlap
+            )
+            if not all_chunks:
+                raise ValueError("re-chunking produced no chunks")
+
+            # Swap old chunks for new ones in a single transaction
+            await session.execute(delete(Chunk).where(Chunk.document_id == document_id))
+            chunk_count = await insert_chunks(session, document_id, all_chunks)
+            doc.status = "ready"
+            await bump_corpus_version(session)
+            await session.commit()
+            logger.info(
+                f"Re-chunked {doc.filename} (size={chunk_size}, overlap={chunk_overlap}): "
+                f"{chunk_count} chunks"
+            )
+
+        except Exception as e:
+            logger.error(f"Error re-chunking {document_id}: {e}")
+            # Old chunks are untouched; put the document back as it was
+            await session.rollback()
+            await session.execute(
+                Document.__table__.update()
+                .where(Document.__table__.c.id == document_id)
+                .values(status=previous_status)
+            )
+            await session.commit()
+
+    await engine.dispose()
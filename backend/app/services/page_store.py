@@ -0,0 +1,16 @@
+import json
+import zlib
+
+# Stored page text is zlib-compressed compact JSON: [[page_number, text], ...]
+_COMPRESSION_LEVEL = 6
+
+
+def pack_pages(pages: list[tuple[int, str]]) -> bytes:
+    """Serialize extract_text_by_page output for storage."""
+    payload = json.dumps(pages, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(payload.encode("utf-8"), _COMPRESSION_LEVEL)
+
+
+def unpack_pages(data: bytes) -> list[tuple[int, str]]:
+    """Inverse of pack_pages."""
+    return [(page_number, text) for page_number, text in json.loads(zlib.decompress(data))]
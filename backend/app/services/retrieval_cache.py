@@ -0,0 +1,143 @@
+import hashlib
+import sys
+from collections import OrderedDict
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+
+settings = get_settings()
+
+_VERSION_SQL = text("SELECT version FROM corpus_version WHERE id = 1")
+_BUMP_SQL = text("UPDATE corpus_version SET version = version + 1 WHERE id = 1")
+
+# Rough per-row cost besides the content string: the dict, the id and
+# document_id strings, source_file, page_number and similarity
+_ROW_OVERHEAD_BYTES = 600
+_KEY_OVERHEAD_BYTES = 300
+
+# Selection stats are a few small ints per document selection
+_MAX_SELECTION_STATS = 256
+
+
+def _estimate_size(key: tuple, rows: tuple[dict, ...]) -> int:
+    """Approximate memory held by one cache entry, dominated by chunk content."""
+    size = _KEY_OVERHEAD_BYTES + sum(sys.getsizeof(doc_id) for doc_id in key[2] or ())
+    for row in rows:
+        size += _ROW_OVERHEAD_BYTES + sys.getsizeof(row.get("content") or "")
+    return size
+
+
+class RetrievalCache:
+    """
+    LRU cache of retrieval results, invalidated by a corpus version counter.
+
+    The counter lives in the corpus_version table and is bumped in the same
+    transaction as every change to the stored chunks, so each worker sees
+    another worker's upload or delete on its next lookup. The version is part
+    of every key, and entries from an older version are dropped as soon as a
+    newer one is seen.
+
+    Memory is bounded by an estimate of the cached rows' size rather than the
+    entry count, since one entry can hold up to top_k full chunks; least
+    recently used entries are evicted until the total fits in max_bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (rows, estimated size in bytes)
+        self._entries: OrderedDict[tuple, tuple[tuple[dict, ...], int]] = OrderedDict()
+        # Chunk counts per document selection, used to pick a filtered-search plan
+        self._selection_stats: OrderedDict[tuple, dict] = OrderedDict()
+
+    async def current_version(self, db: AsyncSession) -> int:
+        """Read the corpus version and drop everything cached for older ones."""
+        if self.max_bytes <= 0:
+            return self.version
+        version = (await db.execute(_VERSION_SQL)).scalar_one()
+        if version > self.version:
+            self.version = version
+            self._entries.clear()
+            self.total_bytes = 0
+            self._selection_stats.clear()
+        return version
+
+    def make_key(
+        self,
+        version: int,
+        query_embedding,
+        document_ids: list[str] | None,
+        top_k: int,
+        threshold: float,
+    ) -> tuple:
+        digest = hashlib.blake2b(
+            np.asarray(query_embedding, dtype=np.float32).tobytes(), digest_size=16
+        ).digest()
+        doc_filter = tuple(sorted(set(document_ids))) if document_ids else None
+        return (version, digest, doc_filter, top_k, threshold)
+
+    def get(self, key: tuple) -> list[dict] | None:
+        if self.max_bytes <= 0:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return [dict(row) for row in entry[0]]
+
+    def put(self, key: tuple, rows: list[dict]) -> None:
+        # Drop results whose corpus version was superseded while the query ran
+        if self.max_bytes <= 0 or key[0] != self.version:
+            return
+        stored = tuple(dict(row) for row in rows)
+        size = _estimate_size(key, stored)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.total_bytes -= previous[1]
+        self._entries[key] = (stored, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted
+
+    def get_selection_stats(self, doc_filter: tuple) -> dict | None:
+        stats = self._selection_stats.get(doc_filter)
+        if stats is not None:
+            self._selection_stats.move_to_end(doc_filter)
+        return stats
+
+    def put_selection_stats(self, doc_filter: tuple, stats: dict) -> None:
+        if self.max_bytes <= 0:
+            return
+        self._selection_stats[doc_filter] = stats
+        while len(self._selection_stats) > _MAX_SELECTION_STATS:
+            self._selection_stats.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "corpus_version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+retrieval_cache = RetrievalCache(int(settings.retrieval_cache_max_mb * 1024 * 1024))
+
+
+async def bump_corpus_version(db: AsyncSession) -> None:
+    """
+    Call in the transaction that changes the set of stored chunks, right
+    before committing it (the row stays locked until the commit).
+    """
+    await db.execute(_BUMP_SQL)
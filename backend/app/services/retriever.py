@@ -1,14 +1,118 @@
 import asyncio
 import logging
 import time
+import uuid
+import numpy as np
+from pgvector.utils import Vector
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.services.embedder import embed_query
+from app.services.embedder import embed_query, embed_texts
+from app.services.retrieval_cache import retrieval_cache
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Direct mode registers pgvector's binary codec (see app.api.deps)
+BINARY_VECTORS = settings.db_connection_mode == "direct"
+
+# Max query vectors sent in one batch-retrieval statement
+BATCH_SQL_QUERIES = 256
+
+# Use CAST() instead of :: to avoid asyncpg parameter parsing conflicts
+SEARCH_SQL = text("""
+    SELECT
+        CAST(id AS text),
+        CAST(document_id AS text),
+        source_file,
+        page_number,
+        content,
+        1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
+    FROM chunks
+    WHERE 1 - (embedding <=> CAST(:embedding AS vector)) > :threshold
+    ORDER BY embedding <=> CAST(:embedding AS vector)
+    LIMIT :top_k
+""")
+
+# Candidate window growth factor for index scans with a document filter
+_WIDEN_FACTOR = 4
+
+_SELECTION_STATS_SQL = text("""
+    SELECT
+        (SELECT count(*) FROM chunks
+         WHERE document_id = ANY(CAST(:document_ids AS uuid[]))) AS selected,
+        (SELECT CAST(reltuples AS bigint) FROM pg_class
+         WHERE oid = CAST('chunks' AS regclass)) AS total,
+        EXISTS (
+            SELECT 1 FROM pg_indexes
+            WHERE tablename = 'chunks'
+              AND (indexdef ILIKE '%USING hnsw%' OR indexdef ILIKE '%USING ivfflat%')
+        ) AS has_ann_index
+""")
+
+# Exact search restricted to the selected documents: the MATERIALIZED CTE
+# pulls their rows through the document_id index and keeps the planner from
+# pushing the filter under an ANN index scan.
+_EXACT_FILTERED_SQL = text("""
+    WITH selected AS MATERIALIZED (
+        SELECT id, document_id, source_file, page_number, content, embedding
+        FROM chunks
+        WHERE document_id = ANY(CAST(:document_ids AS uuid[]))
+    )
+    SELECT
+        CAST(id AS text) AS id,
+        CAST(document_id AS text) AS document_id,
+        source_file,
+        page_number,
+        content,
+        1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
+    FROM selected
+    WHERE 1 - (embedding <=> CAST(:embedding AS vector)) > :threshold
+    ORDER BY embedding <=> CAST(:embedding AS vector)
+    LIMIT :top_k
+""")
+
+# Index scan over the nearest :candidates chunks, filtered afterwards. The
+# frontier row reports how many candidates the index produced and the
+# distance of the farthest one, which drives the widening loop.
+_WINDOW_FILTERED_SQL = text("""
+    WITH nearest AS MATERIALIZED (
+        SELECT
+            id, document_id, source_file, page_number, content,
+            embedding <=> CAST(:embedding AS vector) AS distance
+        FROM chunks
+        ORDER BY embedding <=> CAST(:embedding AS vector)
+        LIMIT :candidates
+    ),
+    frontier AS (
+        SELECT count(*) AS scanned, max(distance) AS max_distance FROM nearest
+    )
+    SELECT
+        f.scanned,
+        f.max_distance,
+        m.id,
+        m.document_id,
+        m.source_file,
+        m.page_number,
+        m.content,
+        m.similarity
+    FROM frontier AS f
+    LEFT JOIN LATERAL (
+        SELECT
+            CAST(id AS text) AS id,
+            CAST(document_id AS text) AS document_id,
+            source_file,
+            page_number,
+            content,
+            1 - distance AS similarity
+        FROM nearest
+        WHERE document_id = ANY(CAST(:document_ids AS uuid[]))
+          AND 1 - distance > :threshold
+        ORDER BY distance
+        LIMIT :top_k
+    ) AS m ON true
+""")
+
 
 async def retrieve_chunks(
     query: str,
@@ -30,52 +134,265 @@ async def retrieve_chunks(
     t1 = time.perf_counter()
     logger.warning(f"⏱ EMBEDDING took {t1 - t0:.2f}s")
 
-    embedding_str = str(query_embedding)
+    # Identical query + filter against an unchanged corpus: skip the vector search
+    version = await retrieval_cache.current_version(db)
+    cache_key = retrieval_cache.make_key(
+        version, query_embedding, document_ids, top_k, settings.similarity_threshold
+    )
+    cached = retrieval_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    # Build SQL — use CAST() instead of :: to avoid asyncpg parameter parsing conflicts
-    if document_ids:
-        # Build a comma-separated list for IN clause (asyncpg doesn't handle uuid[] well via pooler)
-        doc_id_placeholders = ", ".join(f"'{did}'" for did in document_ids)
-        sql = text(f"""
-            SELECT
-                CAST(id AS text),
-                CAST(document_id AS text),
-                source_file,
-                page_number,
-                content,
-                1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
+    params = {
+        "embedding": vector_param(query_embedding),
+        "threshold": settings.similarity_threshold,
+        "top_k": top_k,
+    }
+
+    doc_uuids = parse_document_ids(document_ids)
+    if doc_uuids:
+        rows = await _filtered_search(db, params, doc_uuids)
+        retrieval_cache.put(cache_key, rows)
+        return rows
+
+    result = await db.execute(SEARCH_SQL, params)
+    rows = [dict(row) for row in result.mappings().all()]
+
+    retrieval_cache.put(cache_key, rows)
+    return rows
+
+
+def vector_param(embedding, binary: bool = BINARY_VECTORS):
+    """
+    Query-vector bind value: a float32 array for the binary codec (direct
+    mode), or pgvector's text literal (pooler mode, no codec registered).
+    """
+    if binary:
+        return np.asarray(embedding, dtype=np.float32)
+    return _vector_text(embedding)
+
+
+def _vector_text(embedding) -> str:
+    """pgvector text literal for a list or array of floats."""
+    return "[" + ",".join(map(str, np.asarray(embedding, dtype=np.float32).tolist())) + "]"
+
+
+def parse_document_ids(document_ids: list[str] | None) -> list[uuid.UUID] | None:
+    """Validate document ids; raises ValueError on a malformed id."""
+    if not document_ids:
+        return None
+    return [uuid.UUID(did) for did in dict.fromkeys(document_ids)]
+
+
+async def _selection_stats(db: AsyncSession, doc_uuids: list[uuid.UUID]) -> dict:
+    """Chunk counts for the selected documents and the whole table (cached per corpus version)."""
+    key = tuple(sorted(str(d) for d in doc_uuids))
+    stats = retrieval_cache.get_selection_stats(key)
+    if stats is None:
+        result = await db.execute(_SELECTION_STATS_SQL, {"document_ids": doc_uuids})
+        stats = dict(result.mappings().one())
+        # An empty selection may be a document that is still being ingested
+        if stats["selected"] > 0:
+            retrieval_cache.put_selection_stats(key, stats)
+    return stats
+
+
+def _use_exact_scan(stats: dict) -> bool:
+    """Exact scan for small selections, or whenever an ANN index can't help."""
+    return (
+        stats["selected"] <= settings.filtered_exact_max_chunks
+        or not stats["has_ann_index"]
+        or stats["total"] <= 0  # never analyzed
+    )
+
+
+async def _filtered_search(
+    db: AsyncSession,
+    params: dict,
+    doc_uuids: list[uuid.UUID],
+    stats: dict | None = None,
+) -> list[dict]:
+    """
+    Similarity search restricted to doc_uuids.
+
+    Small selections are scanned exactly. Large ones walk the ANN index over
+    a window of nearest candidates, widening it until top_k matches are found,
+    and fall back to the exact scan when the window gets too big.
+    """
+    params = {**params, "document_ids": doc_uuids}
+    if stats is None:
+        stats = await _selection_stats(db, doc_uuids)
+    if stats["selected"] == 0:
+        return []
+
+    if not _use_exact_scan(stats):
+        top_k = params["top_k"]
+        # Expect selected/total of the candidates to match the filter; start with 2x that
+        candidates = top_k * max(1, -(-stats["total"] // stats["selected"])) * 2
+        while candidates <= settings.filtered_max_candidates:
+            # HNSW only returns ef_search rows per scan; it can't exceed 1000
+            await db.execute(
+                text("SELECT set_config('hnsw.ef_search', :ef_search, true)"),
+                {"ef_search": str(min(candidates, 1000))},
+            )
+            result = await db.execute(_WINDOW_FILTERED_SQL, {**params, "candidates": candidates})
+            window = result.mappings().all()
+            rows = [
+                {k: row[k] for k in ("id", "document_id", "source_file", "page_number", "content", "similarity")}
+                for row in window
+                if row["id"] is not None
+            ]
+            frontier = window[0]
+            if len(rows) >= top_k:
+                return rows
+            if frontier["scanned"] < candidates:
+                break  # the index returned fewer rows than asked — can't widen further
+            if frontier["max_distance"] is not None and 1 - frontier["max_distance"] <= params["threshold"]:
+                return rows  # nothing beyond the window can pass the threshold
+            candidates *= _WIDEN_FACTOR
+
+    result = await db.execute(_EXACT_FILTERED_SQL, params)
+    return [dict(row) for row in result.mappings().all()]
+
+
+# Batch query vectors: a vector[] bound through the binary codec in direct
+# mode; in pooler mode a text array literal cast on the server.
+_VECTOR_ARRAY_SQL = (
+    "CAST(:embeddings AS vector[])"
+    if BINARY_VECTORS
+    else "CAST(CAST(:embeddings AS text) AS vector[])"
+)
+
+
+def vector_array_param(embeddings, binary: bool = BINARY_VECTORS):
+    """
+    Bind value for _VECTOR_ARRAY_SQL. Rows are wrapped in pgvector's Vector
+    because asyncpg would read nested arrays or lists as extra dimensions.
+    """
+    if binary:
+        return [Vector(np.asarray(vec, dtype=np.float32)) for vec in embeddings]
+    return _vector_array_literal(embeddings)
+
+
+def _vector_array_literal(embeddings) -> str:
+    """Render vectors as a Postgres array literal castable to vector[]."""
+    return "{" + ",".join(f'"{_vector_text(vec)}"' for vec in embeddings) + "}"
+
+
+async def retrieve_chunks_batch(
+    queries: list[str],
+    db: AsyncSession,
+    document_ids: list[str] | None = None,
+    top_k: int | None = None,
+) -> list[list[dict]]:
+    """
+    Retrieve top-k chunks for many queries at once.
+
+    All queries are embedded in a single embed_texts call and searched with one
+    LATERAL-join statement per BATCH_SQL_QUERIES queries (large document
+    selections under an ANN index are searched per query, see below). Returns
+    one list of chunks per query, in input order.
+    """
+    if top_k is None:
+        top_k = settings.top_k
+    doc_uuids = parse_document_ids(document_ids)
+
+    t0 = time.perf_counter()
+    loop = asyncio.get_event_loop()
+    embeddings = await loop.run_in_executor(None, embed_texts, queries)
+    t1 = time.perf_counter()
+    logger.warning(f"⏱ BATCH EMBEDDING of {len(queries)} queries took {t1 - t0:.2f}s")
+
+    results: list[list[dict] | None] = [None] * len(queries)
+    version = await retrieval_cache.current_version(db)
+    keys = [
+        retrieval_cache.make_key(version, emb, document_ids, top_k, settings.similarity_threshold)
+        for emb in embeddings
+    ]
+    pending = []
+    for i, key in enumerate(keys):
+        results[i] = retrieval_cache.get(key)
+        if results[i] is None:
+            pending.append(i)
+    searched = len(pending)
+
+    # Selections the single-query path scans exactly are searched here as a
+    # materialized subset; large ones under an ANN index need the widening
+    # candidate window, which is per query, so they go through _filtered_search.
+    selected_cte = ""
+    source = "chunks"
+    if doc_uuids and pending:
+        stats = await _selection_stats(db, doc_uuids)
+        if stats["selected"] == 0 or not _use_exact_scan(stats):
+            for i in pending:
+                rows = []
+                if stats["selected"] > 0:
+                    params = {
+                        "embedding": vector_param(embeddings[i]),
+                        "threshold": settings.similarity_threshold,
+                        "top_k": top_k,
+                    }
+                    rows = await _filtered_search(db, params, doc_uuids, stats)
+                results[i] = rows
+                retrieval_cache.put(keys[i], rows)
+            pending = []
+        else:
+            source = "selected AS chunks"
+            selected_cte = """
+        WITH selected AS MATERIALIZED (
+            SELECT id, document_id, source_file, page_number, content, embedding
             FROM chunks
-            WHERE document_id IN ({doc_id_placeholders})
-              AND 1 - (embedding <=> CAST(:embedding AS vector)) > :threshold
-            ORDER BY embedding <=> CAST(:embedding AS vector)
-            LIMIT :top_k
-        """)
-        params = {
-            "embedding": embedding_str,
-            "threshold": settings.similarity_threshold,
-            "top_k": top_k,
-        }
-    else:
-        sql = text("""
+            WHERE document_id = ANY(CAST(:document_ids AS uuid[]))
+        )"""
+
+    sql = text(f"""{selected_cte}
+        SELECT
+            q.ord AS query_index,
+            c.id,
+            c.document_id,
+            c.source_file,
+            c.page_number,
+            c.content,
+            c.similarity
+        FROM unnest({_VECTOR_ARRAY_SQL}) WITH ORDINALITY AS q(embedding, ord)
+        CROSS JOIN LATERAL (
             SELECT
-                CAST(id AS text),
-                CAST(document_id AS text),
-                source_file,
-                page_number,
-                content,
-                1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
-            FROM chunks
-            WHERE 1 - (embedding <=> CAST(:embedding AS vector)) > :threshold
-            ORDER BY embedding <=> CAST(:embedding AS vector)
+                CAST(chunks.id AS text) AS id,
+                CAST(chunks.document_id AS text) AS document_id,
+                chunks.source_file,
+                chunks.page_number,
+                chunks.content,
+                1 - (chunks.embedding <=> q.embedding) AS similarity
+            FROM {source}
+            WHERE 1 - (chunks.embedding <=> q.embedding) > :threshold
+            ORDER BY chunks.embedding <=> q.embedding
             LIMIT :top_k
-        """)
+        ) AS c
+        ORDER BY q.ord, c.similarity DESC
+    """)
+
+    for start in range(0, len(pending), BATCH_SQL_QUERIES):
+        group = pending[start:start + BATCH_SQL_QUERIES]
         params = {
-            "embedding": embedding_str,
+            "embeddings": vector_array_param([embeddings[i] for i in group]),
             "threshold": settings.similarity_threshold,
             "top_k": top_k,
         }
+        if doc_uuids:
+            params["document_ids"] = doc_uuids
+
+        grouped: list[list[dict]] = [[] for _ in group]
+        result = await db.execute(sql, params)
+        for row in result.mappings().all():
+            row = dict(row)
+            grouped[row.pop("query_index") - 1].append(row)
 
-    result = await db.execute(sql, params)
-    rows = result.mappings().all()
+        for i, rows in zip(group, grouped):
+            results[i] = rows
+            retrieval_cache.put(keys[i], rows)
 
-    return [dict(row) for row in rows]
+    logger.warning(
+        f"⏱ BATCH SEARCH of {searched} queries ({len(queries) - searched} cached) "
+        f"took {time.perf_counter() - t1:.2f}s"
+    )
+    return results
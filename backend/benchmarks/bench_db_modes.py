@@ -0,0 +1,74 @@
+"""
+Per-query search latency: pooler mode vs direct mode.
+
+Runs the unfiltered similarity search (app.services.retriever.SEARCH_SQL)
+with random query vectors through an engine built for each connection mode:
+
+  pooler  statement cache off, vector sent as a text literal
+  direct  prepared statements cached, vector sent as float32 binary
+
+Point SUPABASE_DB_URL at a database that already holds chunks. Direct mode
+must connect to Postgres itself (port 5432), not to a transaction pooler.
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_modes [--queries 200] [--warmup 20]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import numpy as np
+from app.api.deps import create_db_engine
+from app.config import get_settings
+from app.services.retriever import SEARCH_SQL, vector_param
+
+settings = get_settings()
+
+
+async def bench_mode(mode: str, vectors: np.ndarray, warmup: int) -> list[float]:
+    engine = create_db_engine(settings.supabase_db_url, mode=mode, pool_size=1)
+    timings = []
+    try:
+        async with engine.connect() as conn:
+            for i, vec in enumerate(vectors):
+                params = {
+                    "embedding": vector_param(vec, binary=mode == "direct"),
+                    "threshold": settings.similarity_threshold,
+                    "top_k": settings.top_k,
+                }
+                t0 = time.perf_counter()
+                result = await conn.execute(SEARCH_SQL, params)
+                result.all()
+                if i >= warmup:
+                    timings.append(time.perf_counter() - t0)
+    finally:
+        await engine.dispose()
+    return timings
+
+
+def _report(mode: str, timings: list[float]) -> None:
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(
+        f"{mode:<8} n={len(ms):<5} mean {statistics.mean(ms):8.2f} ms   "
+        f"p50 {statistics.median(ms):8.2f} ms   p95 {p95:8.2f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.queries + args.warmup, settings.embedding_dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    print("== Search latency by connection mode ==")
+    for mode in ("pooler", "direct"):
+        _report(mode, await bench_mode(mode, vectors, args.warmup))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""
+Peak-RSS benchmark for ingesting a large document's embeddings.
+
+Builds a synthetic N-page document, chunks it with the real chunker and
+creates the Chunk rows ingestion would insert, comparing:
+
+  lists    all embeddings converted to nested Python lists and every row kept
+           until commit (the previous ingestion path)
+  float32  embeddings kept as float32 arrays and processed in windows of
+           ingest_batch_size rows, each dropped after its flush (current path)
+
+Each mode runs in a fresh interpreter and reports ru_maxrss. Vectors are
+random by default so the numbers isolate representation cost from model
+memory; --real-model embeds with BGE-M3 instead (slow on CPU).
+
+Usage (from backend/):
+    python -m benchmarks.bench_embed_memory [--pages 1000] [--real-model]
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import os
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SENTENCE = (
+    "The committee reviewed the quarterly results and noted that revenue grew "
+    "in every region, while operating costs remained within the approved budget. "
+)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _embedder(real_model: bool, dim: int):
+    if real_model:
+        from app.services.embedder import embed_texts
+        return embed_texts
+
+    rng = np.random.default_rng(0)
+
+    def fake_embed(texts: list[str], batch_size: int = 32) -> np.ndarray:
+        return rng.standard_normal((len(texts), dim), dtype=np.float32)
+
+    return fake_embed
+
+
+def run_mode(mode: str, pages: int, real_model: bool) -> dict:
+    from app.config import get_settings
+    from app.models.database import Chunk
+    from app.services.chunker import chunk_pages
+
+    settings = get_settings()
+    embed = _embedder(real_model, settings.embedding_dim)
+    page_text = (_SENTENCE * 25).strip()
+    doc_pages = [(i + 1, page_text) for i in range(pages)]
+    all_chunks = chunk_pages(doc_pages, "bench", "bench.pdf")
+    baseline = _peak_rss_mb()
+
+    def make_row(chunk_data, embedding):
+        return Chunk(
+            source_file=chunk_data["source_file"],
+            page_number=chunk_data["page_number"],
+            content=chunk_data["content"],
+            embedding=embedding,
+            chunk_index=chunk_data["chunk_index"],
+        )
+
+    if mode == "lists":
+        embeddings = embed([c["content"] for c in all_chunks], batch_size=32).tolist()
+        rows = [make_row(c, e) for c, e in zip(all_chunks, embeddings)]
+        kept = len(rows)
+    else:
+        kept = 0
+        for start in range(0, len(all_chunks), settings.ingest_batch_size):
+            window = all_chunks[start:start + settings.ingest_batch_size]
+            embeddings = embed([c["content"] for c in window], batch_size=32)
+            rows = [make_row(c, e) for c, e in zip(window, embeddings)]
+            kept = max(kept, len(rows))
+            del rows, embeddings
+
+    return {
+        "mode": mode,
+        "chunks": len(all_chunks),
+        "max_rows_alive": kept,
+        "baseline_mb": round(baseline, 1),
+        "peak_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--real-model", action="store_true")
+    parser.add_argument("--mode", choices=["lists", "float32"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: run one mode and print its result
+        print(json.dumps(run_mode(args.mode, args.pages, args.real_model)))
+        return
+
+    print(f"== Embedding memory, {args.pages}-page document ==")
+    for mode in ("lists", "float32"):
+        cmd = [sys.executable, "-m", "benchmarks.bench_embed_memory", "--mode", mode, "--pages", str(args.pages)]
+        if args.real_model:
+            cmd.append("--real-model")
+        out = subprocess.run(cmd, cwd=BACKEND_DIR, check=True, capture_output=True, text=True)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"{r['mode']:<8} chunks {r['chunks']:<6} rows alive {r['max_rows_alive']:<6} "
+            f"peak RSS {r['peak_mb']:8.1f} MB   (+{r['peak_mb'] - r['baseline_mb']:.1f} MB over baseline)"
+        )
+
+
+if __name__ == "__main__":
+    main()
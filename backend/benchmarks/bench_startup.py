@@ -0,0 +1,109 @@
+"""
+Startup-time benchmark.
+
+Measures, each in a fresh interpreter:
+  - import of the API module (what uvicorn pays before accepting requests)
+  - embedder warm-up (BGE-M3 load + first encode)
+
+With --serve, also launches uvicorn and reports time until /health and /ready
+return 200 (needs the database from SUPABASE_DB_URL to be reachable).
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup [--runs 3] [--serve]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _time_snippet(snippet: str) -> float:
+    """Run a snippet in a fresh interpreter and return the time it reports."""
+    code = f"import time; t0 = time.perf_counter(); {snippet}; print(time.perf_counter() - t0)"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _wait_for(url: str, deadline: float) -> float | None:
+    """Poll url until it returns 200; return the time it happened (or None on timeout)."""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def bench_server(port: int, timeout: float) -> dict[str, float | None]:
+    """Launch uvicorn and measure time to /health and /ready."""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = t0 + timeout
+        health = _wait_for(f"http://127.0.0.1:{port}/health", deadline)
+        ready = _wait_for(f"http://127.0.0.1:{port}/ready", deadline)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {
+        "health": health - t0 if health else None,
+        "ready": ready - t0 if ready else None,
+    }
+
+
+def _report(name: str, samples: list[float]) -> None:
+    print(
+        f"{name:<28} median {statistics.median(samples):8.3f}s   "
+        f"min {min(samples):8.3f}s   max {max(samples):8.3f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--serve", action="store_true", help="also time a real uvicorn startup")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    print("== Startup benchmark ==")
+    _report("import app.main", [_time_snippet("import app.main") for _ in range(args.runs)])
+    _report(
+        "embedder warm-up",
+        [_time_snippet("from app.services.embedder import warm_up; warm_up()") for _ in range(args.runs)],
+    )
+
+    if args.serve:
+        for _ in range(args.runs):
+            result = bench_server(args.port, args.timeout)
+            print(
+                "uvicorn start               "
+                + "   ".join(
+                    f"{k} {v:.3f}s" if v is not None else f"{k} timeout"
+                    for k, v in result.items()
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Deterministic stand-in for the Ollama HTTP API, for load tests.
+
+Serves the endpoints the backend uses (/api/chat streaming and
+non-streaming, /api/generate for the warm-up ping) with a fixed response
+paced at a configurable first-token delay and token rate, so chat latency
+measurements reflect the backend rather than the model.
+
+Usage (from backend/):
+    python -m benchmarks.stub_llm --port 11500 --tokens-per-sec 40 --first-token-delay 0.3
+    OLLAMA_HOST=http://127.0.0.1:11500 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import time
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+# Cites a source in the format the chat route parses, so citation handling runs too
+_WORDS = (
+    "According to the uploaded document the answer is described in detail "
+    "[Source: stub.pdf, Page 1] and further supported by the appendix "
+    "[Source: stub.pdf, Page 2]."
+).split(" ")
+
+
+def _timestamp() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def create_app(tokens: int, tokens_per_sec: float, first_token_delay: float) -> Starlette:
+    token_interval = 1.0 / tokens_per_sec if tokens_per_sec > 0 else 0.0
+    text_tokens = [_WORDS[i % len(_WORDS)] + " " for i in range(tokens)]
+
+    def _message(model: str, content: str, done: bool) -> dict:
+        return {
+            "model": model,
+            "created_at": _timestamp(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+
+    async def chat(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+
+        if not body.get("stream", True):
+            await asyncio.sleep(first_token_delay + token_interval * tokens)
+            return JSONResponse(_message(model, "".join(text_tokens).strip(), True))
+
+        async def stream():
+            await asyncio.sleep(first_token_delay)
+            start = time.perf_counter()
+            for i, token in enumerate(text_tokens):
+                # Pace against the start time so the rate doesn't drift under load
+                delay = start + i * token_interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield json.dumps(_message(model, token, False)) + "\n"
+            yield json.dumps(_message(model, "", True)) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    async def generate(request: Request):
+        body = await request.json()
+        # An empty prompt only "loads" the model, like Ollama
+        return JSONResponse({
+            "model": body.get("model", "stub"),
+            "created_at": _timestamp(),
+            "response": "",
+            "done": True,
+        })
+
+    async def tags(request: Request):
+        return JSONResponse({"models": [{"name": "stub"}]})
+
+    return Starlette(routes=[
+        Route("/api/chat", chat, methods=["POST"]),
+        Route("/api/generate", generate, methods=["POST"]),
+        Route("/api/tags", tags, methods=["GET"]),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--tokens", type=int, default=100, help="tokens per response")
+    parser.add_argument("--tokens-per-sec", type=float, default=40.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="seconds")
+    args = parser.parse_args()
+
+    app = create_app(args.tokens, args.tokens_per_sec, args.first_token_delay)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
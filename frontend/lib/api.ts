@@ -28,7 +28,8 @@ export async function deleteDocument(documentId: string): Promise<Response> {
 export async function sendChatMessage(
     query: string,
     documentIds?: string[],
-    chatHistory?: { role: string; content: string }[]
+    chatHistory?: { role: string; content: string }[],
+    sessionId?: string
 ): Promise<Response> {
     return fetch(`${API_BASE}/chat`, {
         method: "POST",
@@ -37,6 +38,7 @@ export async function sendChatMessage(
             query,
             document_ids: documentIds,
             chat_history: chatHistory,
+            session_id: sessionId,
         }),
     });
 }
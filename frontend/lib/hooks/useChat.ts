@@ -1,12 +1,14 @@
 "use client";
 
-import { useState, useCallback } from "react";
+import { useState, useCallback, useRef } from "react";
 import { ChatMessage, CitationSource, ChatEvent } from "@/lib/types";
 import { sendChatMessage } from "@/lib/api";
 
 export function useChat() {
     const [messages, setMessages] = useState<ChatMessage[]>([]);
     const [isStreaming, setIsStreaming] = useState(false);
+    // Server-side conversation id; the server keeps history + summary for it
+    const sessionIdRef = useRef<string | undefined>(undefined);
 
     const sendMessage = useCallback(
         async (query: string, documentIds?: string[]) => {
@@ -15,14 +17,20 @@ export function useChat() {
             setMessages((prev) => [...prev, userMessage]);
             setIsStreaming(true);
 
-            // Prepare chat history (last 6 messages)
+            // Prepare chat history (last 6 messages) — only used by the server
+            // to rebuild the conversation if it no longer knows the session
             const history = messages.slice(-6).map((m) => ({
                 role: m.role,
                 content: m.content,
             }));
 
             try {
-                const response = await sendChatMessage(query, documentIds, history);
+                const response = await sendChatMessage(
+                    query,
+                    documentIds,
+                    history,
+                    sessionIdRef.current
+                );
 
                 if (!response.ok) {
                     throw new Error(`HTTP error: ${response.status}`);
@@ -54,6 +62,10 @@ export function useChat() {
                         try {
                             const event: ChatEvent = JSON.parse(line.slice(6));
 
+                            if (event.type === "session" && event.session_id) {
+                                sessionIdRef.current = event.session_id;
+                            }
+
                             if (event.type === "token" && event.content) {
                                 assistantContent += event.content;
                                 setMessages((prev) => {
@@ -114,6 +126,7 @@ export function useChat() {
 
     const clearMessages = useCallback(() => {
         setMessages([]);
+        sessionIdRef.current = undefined;
     }, []);
 
     return { messages, isStreaming, sendMessage, clearMessages };
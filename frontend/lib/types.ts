@@ -33,13 +33,15 @@ export interface CitationSource {
 }
 
 export interface ChatEvent {
-    type: "token" | "citations" | "done" | "error";
+    type: "session" | "token" | "citations" | "done" | "error";
     content?: string;
     sources?: CitationSource[];
+    session_id?: string;
 }
 
 export interface ChatRequest {
     query: string;
     document_ids?: string[];
     chat_history?: { role: string; content: string }[];
+    session_id?: string;
 }